@@ -0,0 +1,115 @@
+"""
+detector.py
+Núcleo de detección compartido por script.py y script2.py.
+
+detect_core(pfd, pw, freq, thr_pfd, thr_pw, fmin, fmax, n_consec) -> (detectado, primera)
+
+pfd  : Power Flux Density de cada muestra
+pw   : Total Spectrum Power (None si el archivo no la trae)
+freq : frecuencia de cada muestra (None = sin filtro de banda)
+
+Una muestra cuenta si supera ambos umbrales y, con filtro, cae en [fmin, fmax].
+Hay detección cuando n_consec muestras seguidas cuentan; `primera` es el índice
+de la primera muestra de esa racha (-1 si no hay detección).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # opcional: sin numba se usan máscaras de NumPy
+    njit = None
+
+if njit is not None:
+    # pw/freq a None se podan en compilación: cada combinación obtiene su propia
+    # especialización sin ramas muertas en el bucle. fastmath solo con "contract"
+    # (FMA): las banderas nnan/ninf romperían las comparaciones con celdas vacías.
+    @njit(cache=True, nogil=True, boundscheck=False, fastmath={"contract"})
+    def _detect_core_numba(pfd, pw, freq, thr_pfd, thr_pw, fmin, fmax, n_consec):
+        run = 0
+        for i in range(pfd.size):
+            if (pfd[i] > thr_pfd and (pw is None or pw[i] > thr_pw)
+                    and (freq is None or (freq[i] >= fmin and freq[i] <= fmax))):
+                run += 1
+                if run >= n_consec:
+                    return True, i - n_consec + 1
+            else:
+                run = 0
+        return False, -1
+
+# Muestras por bloque en la ruta NumPy sin histeresis: la máscara de un bloque
+# (256 KiB) se queda en caché y se deja de leer en cuanto un bloque tiene acierto.
+BLOQUE = 1 << 18
+
+def _mask_numpy(pfd, pw, freq, thr_pfd, thr_pw, fmin, fmax, mask, tmp):
+    # Todas las comparaciones escriben en dos buffers preasignados (out=): sin
+    # temporales nuevos por cada comparación ni por cada bloque
+    np.greater(pfd, thr_pfd, out=mask)
+    if pw is not None:
+        np.greater(pw, thr_pw, out=tmp)
+        np.logical_and(mask, tmp, out=mask)
+    if freq is not None:
+        np.greater_equal(freq, fmin, out=tmp)
+        np.logical_and(mask, tmp, out=mask)
+        np.less_equal(freq, fmax, out=tmp)
+        np.logical_and(mask, tmp, out=mask)
+    return mask
+
+def _detect_core_numpy(pfd, pw, freq, thr_pfd, thr_pw, fmin, fmax, n_consec):
+    if n_consec > 1:
+        mask = np.empty(pfd.size, dtype=bool)
+        mask = _mask_numpy(pfd, pw, freq, thr_pfd, thr_pw, fmin, fmax, mask, np.empty_like(mask))
+        if mask.size < n_consec:
+            return False, -1
+        # Suma de cada ventana de n_consec por diferencia de sumas acumuladas: la
+        # ventana que empieza en i está completa si suma n_consec (todo en NumPy)
+        c = np.cumsum(mask.view(np.uint8), dtype=np.int32 if mask.size < 2**31 else np.int64)
+        hits = (c[n_consec - 1:] - np.concatenate(([0], c[:-n_consec]))) >= n_consec
+        i = int(np.argmax(hits))
+        return (True, i) if hits[i] else (False, -1)
+    # Sin histeresis basta la primera muestra que cumple. Con umbral μ + kσ la PFD
+    # casi nunca lo supera en un espectro tranquilo, así que potencia y banda solo se
+    # evalúan en esas candidatas: pw/freq no se leen enteros salvo que haga falta.
+    # Si un bloque tiene muchas candidatas (>1/8) sale más barata la máscara densa.
+    mask_buf = np.empty(min(pfd.size, BLOQUE), dtype=bool)
+    tmp_buf = np.empty_like(mask_buf)
+    for start in range(0, pfd.size, BLOQUE):
+        end = min(start + BLOQUE, pfd.size)
+        n = end - start
+        mask = np.greater(pfd[start:end], thr_pfd, out=mask_buf[:n])
+        n_cand = np.count_nonzero(mask)
+        if n_cand == 0:
+            continue
+        if n_cand * 8 > n:
+            mask = _mask_numpy(pfd[start:end], None if pw is None else pw[start:end],
+                               None if freq is None else freq[start:end], thr_pfd, thr_pw, fmin, fmax,
+                               mask, tmp_buf[:n])
+            i = int(np.argmax(mask))  # argmax de bool se detiene en el primer True
+            if mask[i]:
+                return True, start + i
+            continue
+        cand = np.flatnonzero(mask) + start
+        ok = np.ones(cand.size, dtype=bool)
+        if pw is not None:
+            np.logical_and(ok, pw[cand] > thr_pw, out=ok)
+        if freq is not None:
+            f = freq[cand]
+            np.logical_and(ok, (f >= fmin) & (f <= fmax), out=ok)
+        i = int(np.argmax(ok))
+        if ok[i]:
+            return True, int(cand[i])
+    return False, -1
+
+def detect_core(pfd: np.ndarray, pw: np.ndarray | None, freq: np.ndarray | None,
+                thr_pfd: float, thr_pw: float | None = None,
+                fmin: float | None = None, fmax: float | None = None,
+                n_consec: int = 1) -> tuple[bool, int]:
+    """Devuelve (detectado, índice de la primera muestra de la racha o -1)."""
+    if pw is None or thr_pw is None:
+        pw, thr_pw = None, 0.0
+    if freq is None or fmin is None or fmax is None:
+        freq, fmin, fmax = None, 0.0, 0.0
+    n_consec = max(int(n_consec), 1)
+    core = _detect_core_numba if njit is not None else _detect_core_numpy
+    detectado, primera = core(pfd, pw, freq, float(thr_pfd), float(thr_pw), float(fmin), float(fmax), n_consec)
+    return bool(detectado), int(primera)
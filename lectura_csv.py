@@ -0,0 +1,206 @@
+"""
+lectura_csv.py
+Lectura de CSV y cachés junto al archivo, compartidas por script.py y script2.py.
+
+leer_cabecera(ruta)                       -> (columnas, codificación)
+leer_csv(ruta, usecols, encoding, ...)    -> DataFrame (o lector por bloques)
+stats_baseline(ruta, pfd, pow, encoding)  -> (μ_pfd, σ_pfd, μ_pow, σ_pow)
+
+Junto a cada CSV se guardan dos cachés con la misma clave [tamaño, mtime_ns]:
+
+<archivo>.meta     : JSON {"v", "key", "cols", "encoding"}
+<archivo>.thr.npz  : arrays "key" y "stats"
+
+Ambos scripts leen y escriben las mismas cachés, por eso su formato vive solo aquí.
+"""
+
+import codecs
+import csv
+import json
+import os
+import threading
+from contextlib import suppress
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    from charset_normalizer import from_bytes
+except ImportError:  # opcional: sin él se asume Latin‑1 cuando no es UTF‑8
+    from_bytes = None
+
+# Versión del formato de .meta: al cambiar cómo se detecta la codificación se sube,
+# y los .meta escritos por versiones anteriores se descartan aunque la clave coincida
+VERSION_META = 2
+
+# Motor multihilo de pyarrow si está instalado; si no, el parser C de pandas.
+MOTOR_CSV = "pyarrow" if find_spec("pyarrow") else "c"
+
+# Dialecto fijo de las exportaciones: nada de inferir separador, cabecera ni comillas.
+OPCIONES_CSV = {"sep": ",", "header": 0, "quoting": csv.QUOTE_MINIMAL}
+if MOTOR_CSV == "c":
+    # pyarrow no admite estas opciones. memory_map: el parser C lee directamente de la
+    # caché de páginas del SO, sin copia intermedia (camino rápido sobre todo en UTF‑8).
+    OPCIONES_CSV.update(low_memory=False, memory_map=True)
+
+# Filas por bloque al leer la baseline en streaming
+TAM_BLOQUE = 1 << 20
+
+# Lo que puede lanzar abrir y parsear un CSV de entrada (inexistente, directorio,
+# vacío, celdas no numéricas...): errores de ese archivo, no del programa
+ERRORES_CARGA = (OSError, ValueError, pd.errors.ParserError, pd.errors.EmptyDataError)
+
+def _escribir_atomico(destino: Path, escribir) -> None:
+    """Escribe ``destino`` con ``escribir(f)`` sobre un temporal del mismo directorio y lo renombra.
+
+    ``os.replace`` es atómico: otro proceso (o el otro script) ve el archivo anterior o el
+    nuevo completo, nunca uno a medias aunque la escritura se corte (Ctrl‑C, disco lleno).
+    """
+    # Temporal único por proceso e hilo (los permisos siguen la umask, como un open normal)
+    tmp = destino.with_name(f".{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            escribir(f)
+        os.replace(tmp, destino)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+BOMS = [(b"\xef\xbb\xbf", "utf-8-sig"), (b"\xff\xfe", "utf-16"), (b"\xfe\xff", "utf-16")]
+
+# Lo único que se acepta de charset_normalizer: variantes de Latin‑1 de un byte que
+# decodifican igual µ, ², ° de las exportaciones. En muestras cortas propone códecs
+# ajenos (hp_roman8, iso8859_16) o multibyte (big5, johab) que se comen separadores.
+LATIN1_COMPATIBLES = {"iso8859-1", "cp1252", "iso8859-15"}
+
+def detectar_encoding(ruta: Path, tam_muestra: int = 65536) -> str:
+    """Decide la codificación con los primeros bytes: BOM → UTF‑8 → Latin‑1 (o cp1252/‑15)."""
+    with open(ruta, "rb") as f:
+        muestra = f.read(tam_muestra)
+    for bom, encoding in BOMS:
+        if muestra.startswith(bom):
+            return encoding
+    try:
+        muestra.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as exc:
+        if exc.reason == "unexpected end of data":  # la muestra cortó un carácter multibyte
+            return "utf-8"
+    if from_bytes is not None:
+        mejor = from_bytes(muestra).best()
+        if mejor is not None and codecs.lookup(mejor.encoding).name in LATIN1_COMPATIBLES:
+            return mejor.encoding
+    return "ISO-8859-1"
+
+def indexar_columnas(columnas: list[str]) -> list[tuple[str, str]]:
+    """Precalcula (nombre en minúsculas, nombre original) una sola vez por archivo."""
+    return [(col.lower(), col) for col in columnas]
+
+def buscar_columna(indice: list[tuple[str, str]], clave: str) -> str | None:
+    """Devuelve la primera columna que contenga la clave dada (case‑insensitive)."""
+    clave = clave.lower()
+    for col_lower, col in indice:
+        if clave in col_lower:
+            return col
+    return None
+
+def leer_cabecera(ruta: str) -> tuple[list[str], str]:
+    """Lee solo la cabecera y devuelve (columnas, codificación detectada).
+
+    El resultado se guarda en ``<archivo>.meta`` junto al CSV; mientras el tamaño y
+    la fecha de modificación no cambien, las siguientes ejecuciones no abren el CSV.
+    Los fallos se lanzan (ver ``ERRORES_CARGA``); informarlos es cosa del llamador.
+    """
+    ruta = Path(ruta)
+    if not ruta.exists():
+        raise FileNotFoundError("no se encontró el archivo")
+    st = ruta.stat()
+    clave = [st.st_size, st.st_mtime_ns]
+    meta = ruta.with_name(ruta.name + ".meta")
+    try:
+        guardado = json.loads(meta.read_text(encoding="utf-8"))
+        if guardado.get("v") == VERSION_META and guardado["key"] == clave:
+            return guardado["cols"], guardado["encoding"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):  # JSON válido pero no un dict
+        pass
+    encoding = detectar_encoding(ruta)
+    columnas = list(pd.read_csv(ruta, nrows=0, encoding=encoding, **OPCIONES_CSV).columns)
+    try:
+        datos = json.dumps({"v": VERSION_META, "key": clave, "cols": columnas, "encoding": encoding}).encode("utf-8")
+        _escribir_atomico(meta, lambda f: f.write(datos))
+    except OSError:
+        pass  # directorio de solo lectura: simplemente no se cachea
+    return columnas, encoding
+
+def leer_csv(ruta: str, usecols: list[str], encoding: str = "utf-8",
+             dtype: str | dict[str, str] = "float64", chunksize: int | None = None):
+    """Lee solo las columnas indicadas, ya tipadas como ``dtype``.
+
+    ``dtype`` también puede ser un dict {columna: tipo}: las columnas que no figuran
+    en él quedan con el tipo que infiera pandas.
+    Con ``chunksize`` devuelve un lector por bloques (siempre con el parser C, pyarrow
+    no lee por bloques) en lugar del DataFrame completo.
+    """
+    # encoding_errors="replace": un byte inválido en columnas no usadas no obliga a reparsear
+    return pd.read_csv(ruta, engine="c" if chunksize else MOTOR_CSV, usecols=usecols,
+                       dtype=dtype if isinstance(dtype, dict) else dict.fromkeys(usecols, dtype),
+                       chunksize=chunksize,
+                       encoding=encoding, encoding_errors="replace", **OPCIONES_CSV)
+
+def acumular_welford(acc: tuple[int, float, float], x: np.ndarray) -> tuple[int, float, float]:
+    """Combina el acumulado (n, media, M2) con un bloque nuevo (fórmula paralela de Welford/Chan).
+
+    Ignora los NaN, igual que ``np.nanmean``/``np.nanstd``.
+    """
+    x = x[~np.isnan(x)]
+    if x.size == 0:
+        return acc
+    n_a, media_a, m2_a = acc
+    n_b = x.size
+    media_b = x.mean(dtype=np.float64)
+    m2_b = float(np.square(x - media_b).sum())
+    n = n_a + n_b
+    delta = media_b - media_a
+    return n, media_a + delta * n_b / n, m2_a + m2_b + delta * delta * n_a * n_b / n
+
+def stats_baseline(ruta: str, pfd_col: str, pow_col: str | None,
+                   encoding: str) -> tuple[float, float, float, float]:
+    """Devuelve (μ_pfd, σ_pfd, μ_pow, σ_pow) de la baseline; NaN si no hay columna de potencia.
+
+    Se cachean en ``<archivo>.thr.npz`` con la misma clave (tamaño, mtime) que el
+    ``.meta``: con la caché vigente la baseline ni siquiera se parsea.
+    """
+    ruta = Path(ruta)
+    st = ruta.stat()
+    clave = np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+    cache = ruta.with_name(ruta.name + ".thr.npz")
+    try:
+        with np.load(cache) as guardado:
+            if np.array_equal(guardado["key"], clave):
+                return tuple(float(x) for x in guardado["stats"])
+    except Exception:  # vacía (EOFError), truncada (BadZipFile), ajena...: se recalcula
+        pass
+
+    # La baseline solo alimenta medias/σ: se lee por bloques en float32 y cada bloque se
+    # pliega en un acumulador de Welford (float64), así la memoria no depende del tamaño
+    # del archivo y baselines que no caben en RAM siguen siendo utilizables.
+    cols = [c for c in [pfd_col, pow_col] if c]
+    acc = {c: (0, 0.0, 0.0) for c in cols}
+    with leer_csv(ruta, cols, encoding, "float32", chunksize=TAM_BLOQUE) as lector:
+        for bloque in lector:
+            for c in cols:
+                acc[c] = acumular_welford(acc[c], bloque[c].to_numpy(dtype=np.float32, copy=False))
+    stats = [np.nan] * 4
+    for i, col in enumerate([pfd_col, pow_col]):
+        if col:
+            n, media, m2 = acc[col]
+            stats[2 * i] = media if n else np.nan
+            stats[2 * i + 1] = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    try:
+        _escribir_atomico(cache, lambda f: np.savez(f, key=clave, stats=np.array(stats, dtype=np.float64)))
+    except OSError:
+        pass  # directorio de solo lectura: simplemente no se cachea
+    return tuple(float(x) for x in stats)
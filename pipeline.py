@@ -0,0 +1,114 @@
+"""
+pipeline.py
+Flujo de evaluación compartido por script.py y script2.py.
+
+Cada script aporta tres funciones:
+
+cargar(ruta)                       -> tupla con lo parseado del CSV
+evaluar(*cargado)                  -> resultado del archivo
+imprimir(ruta, resultado, varios)  -> muestra ese resultado
+
+y aquí se decide cómo se recorren los archivos (hilos productores, pool de procesos
+o stdin con --server), en qué orden se informa y qué se hace con los errores. Con
+el pool, cargar y evaluar viajan a otros procesos: deben ser funciones de módulo
+(o ``partial`` de ellas).
+"""
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import Pool
+
+from lectura_csv import ERRORES_CARGA, buscar_columna, indexar_columnas, leer_cabecera, stats_baseline
+
+def cargar_baseline(ruta: str) -> tuple[str, str | None, tuple[float, float, float, float]]:
+    """Devuelve (columna PFD, columna de potencia o None, (μ_pfd, σ_pfd, μ_pow, σ_pow)).
+
+    Cabecera, columnas y estadísticas comparten el mismo ``try``: cualquier fallo (una
+    celda no numérica incluida) se informa como el de un archivo de datos y termina con
+    código 1, porque sin baseline no hay umbrales.
+    """
+    try:
+        cols, encoding = leer_cabecera(ruta)
+        idx = indexar_columnas(cols)
+        pfd_col = buscar_columna(idx, "Power Flux Density")
+        pow_col = buscar_columna(idx, "Total Spectrum Power")
+        if not pfd_col:
+            raise ValueError("No se encontro la columna 'Power Flux Density'.")
+        return pfd_col, pow_col, stats_baseline(ruta, pfd_col, pow_col, encoding)
+    except ERRORES_CARGA as exc:
+        print(f"ERROR: {ruta}: {exc}")
+        sys.exit(1)
+
+def cargar_en_paralelo(rutas: list[str], cargar, max_adelanto: int = 4):
+    """Etapa productora: parsea los CSV en hilos y entrega (ruta, futuro) en orden.
+
+    Como mucho ``max_adelanto`` archivos van cargados por delante del consumidor: el
+    parseo de los siguientes se solapa con la detección del actual sin acumular
+    todos los DataFrames en memoria. El futuro se resuelve en el consumidor, así que
+    un error de carga aparece en el orden de los archivos, no cuando ocurre.
+    """
+    with ThreadPoolExecutor(max_workers=max_adelanto) as pool:
+        pendientes = deque()
+        for ruta in rutas:
+            pendientes.append((ruta, pool.submit(cargar, ruta)))
+            if len(pendientes) >= max_adelanto:
+                yield pendientes.popleft()
+        while pendientes:
+            yield pendientes.popleft()
+
+def procesar_uno(cargar, evaluar, ruta: str, futuro: Future | None = None) -> tuple[str, object, str | None]:
+    """Carga y evalúa un archivo; con ``futuro`` recoge la carga de ``cargar_en_paralelo``.
+
+    Devuelve (ruta, resultado, error). Un archivo erróneo no lanza: resultado=None y
+    el mensaje en ``error``.
+    """
+    try:
+        cargado = futuro.result() if futuro is not None else cargar(ruta)
+        return ruta, evaluar(*cargado), None
+    except ERRORES_CARGA as exc:
+        return ruta, None, str(exc)
+
+def mostrar_resultados(resultados, imprimir, varios: bool) -> bool:
+    """Imprime cada resultado en cuanto llega, en el orden de los archivos.
+
+    Un archivo que no pudo cargarse se informa en su turno; devuelve False (y deja
+    de consumir) en ese momento.
+    """
+    for ruta, resultado, error in resultados:
+        if error is not None:
+            print(f"ERROR: {ruta}: {error}")
+            return False
+        imprimir(ruta, resultado, varios)
+    return True
+
+def ejecutar(rutas: list[str], cargar, evaluar, imprimir, jobs: int = 1) -> bool:
+    """Evalúa ``rutas`` e imprime sus resultados en orden; False si alguna falló."""
+    varios = len(rutas) > 1
+    if varios and jobs != 1:
+        # Archivos independientes entre sí: un proceso por archivo, sin compartir GIL
+        with Pool(jobs or os.cpu_count()) as pool:
+            ok = mostrar_resultados(pool.imap(partial(procesar_uno, cargar, evaluar), rutas), imprimir, varios)
+            # Tras un error quedan tareas en cola, y Pool.terminate() con el hilo repartidor
+            # a medio put puede bloquearse para siempre: se cierra y se espera a los
+            # workers (lo pendiente se evalúa pero ya no se imprime)
+            pool.close()
+            pool.join()
+        return ok
+    return mostrar_resultados((procesar_uno(cargar, evaluar, ruta, futuro)
+                               for ruta, futuro in cargar_en_paralelo(rutas, cargar)), imprimir, varios)
+
+def servir(cargar, evaluar, imprimir) -> None:
+    """Modo --server: evalúa una ruta por línea de stdin hasta EOF.
+
+    Intérprete, imports, umbrales y kernel compilado se pagan una sola vez; un
+    archivo erróneo se informa y el servidor sigue con la siguiente línea.
+    """
+    for linea in sys.stdin:
+        ruta = linea.strip()
+        if not ruta:
+            continue
+        mostrar_resultados([procesar_uno(cargar, evaluar, ruta)], imprimir, varios=True)
+        sys.stdout.flush()
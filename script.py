@@ -4,90 +4,118 @@ detectar_dron.py
 Detecta la presencia de un dron a partir de mediciones RF en CSV.
 
 Uso:
-    python detectar_dron.py baseline.csv data.csv [--stats]
+    python detectar_dron.py baseline.csv data.csv [data2.csv ...] [--stats]
+    python detectar_dron.py baseline.csv --server < rutas.txt
 
 Posicionales
 ------------
 baseline.csv : datos con el dron APAGADO (calibración)
-data.csv     : datos a evaluar (¿dron presente?)
+data.csv     : datos a evaluar (¿dron presente?); admite varios archivos,
+               que se parsean en segundo plano mientras se evalúa el anterior
 
 Opciones
 --------
 --stats      : imprime estadísticas y umbrales empleados
+-j N         : procesos para analizar varios archivos en paralelo (0 = todos los núcleos)
+--server     : proceso persistente; lee por stdin una ruta de CSV por línea y
+               evalúa cada una con los umbrales ya calibrados
 """
 
 import pandas as pd
 import numpy as np
 import argparse
 import sys
-from pathlib import Path
+from functools import partial
 
-# ---------------------- PARSING DE ARGUMENTOS ------------------------------- #
-parser = argparse.ArgumentParser(description="Detección de dron basada en Power Flux Density y potencia total.")
-parser.add_argument("baseline",  help="CSV con el dron apagado (calibra umbrales).")
-parser.add_argument("datafile",  help="CSV a analizar (detección).")
-parser.add_argument("-s", "--stats", action="store_true", help="Muestra estadísticas de ambos archivos.")
-args = parser.parse_args()
+from detector import detect_core
+from lectura_csv import buscar_columna, indexar_columnas, leer_cabecera, leer_csv
+from pipeline import cargar_baseline, ejecutar, servir
 
 # ------------------------ FUNCIONES AUXILIARES ----------------------------- #
-def leer_csv(ruta: str) -> pd.DataFrame:
-    """Lee un CSV intentando UTF‑8 y, si falla, Latin‑1."""
-    ruta = Path(ruta)
-    if not ruta.exists():
-        print(f"ERROR: no se encontró el archivo '{ruta}'.")
+def cargar_data(ruta: str) -> tuple[pd.DataFrame, str, str | None]:
+    """Parsea un CSV a evaluar y devuelve (df, columna PFD, columna de potencia o None).
+
+    Puede ejecutarse en un hilo productor: los errores se lanzan, no se imprimen.
+    """
+    cols, encoding = leer_cabecera(ruta)
+    idx = indexar_columnas(cols)
+    pfd_col = buscar_columna(idx, "Power Flux Density")
+    pow_col = buscar_columna(idx, "Total Spectrum Power")
+    if not pfd_col:
+        raise ValueError("No se encontro la columna 'Power Flux Density'.")
+    # Solo se parsean las columnas que intervienen en la detección
+    return leer_csv(ruta, [c for c in [pfd_col, pow_col] if c], encoding), pfd_col, pow_col
+
+def evaluar(umbrales: tuple[float, float | None], con_stats: bool, df_data: pd.DataFrame,
+            pfd_col: str, pow_col: str | None) -> tuple[bool, int, pd.DataFrame | None]:
+    """Aplica los umbrales a un archivo ya cargado: (detectado, primera fila, describe() o None)."""
+    umbral_pfd, umbral_pow_base = umbrales
+    # El umbral de potencia solo aplica si ambos archivos traen esa columna
+    umbral_power = umbral_pow_base if pow_col else None
+    pfd_arr = df_data[pfd_col].to_numpy(dtype=np.float64, copy=False)
+    pow_arr = df_data[pow_col].to_numpy(dtype=np.float64, copy=False) if umbral_power is not None else None
+    # Una sola pasada con salida temprana (kernel compilado si hay numba)
+    dron_detectado, primera = detect_core(pfd_arr, pow_arr, None, umbral_pfd, umbral_power)
+    resumen = df_data[[c for c in [pfd_col, pow_col] if c]].describe().T if con_stats else None
+    return dron_detectado, primera, resumen
+
+def imprimir(ruta: str, resultado: tuple[bool, int, pd.DataFrame | None], varios: bool) -> None:
+    """Imprime el resultado de un archivo; con varios, cada bloque lleva su ruta."""
+    dron_detectado, primera, resumen = resultado
+    sufijo = f": {ruta}" if varios else ""
+    if resumen is not None:
+        print(f"\n--- ESTADISTICAS (data{sufijo}) ---")
+        print(resumen)
+        if dron_detectado:
+            print(f"Primera muestra sobre umbral: fila {primera}")
+
+    print(f"\n===== RESULTADO{sufijo} =====")
+    print("Dron detectado" if dron_detectado else "Sin dron")
+
+def calibrar(ruta_base: str, con_stats: bool) -> tuple[float, float | None]:
+    """Devuelve (umbral_pfd, umbral_pow o None) a partir de la baseline."""
+    # ------------------------ CARGA DE BASELINE ----------------------------- #
+    pfd_col_base, pow_col_base, stats = cargar_baseline(ruta_base)
+    mean_pfd_base, std_pfd_base, mean_pow_base, std_pow_base = stats
+
+    # --------------------- CALCULO DE UMBRALES ------------------------------ #
+    umbral_pfd    = mean_pfd_base + 3 * std_pfd_base
+    umbral_pow_base = mean_pow_base + 3 * std_pow_base if pow_col_base else None
+
+    if con_stats:
+        print("\n--- ESTADISTICAS (baseline) ---")
+        print(f"{pfd_col_base}: μ={mean_pfd_base:.2f}, σ={std_pfd_base:.2f} ⇒ umbral={umbral_pfd:.2f}")
+        if umbral_pow_base is not None:
+            print(f"{pow_col_base}: μ={mean_pow_base:.2f} dBm, σ={std_pow_base:.2f} ⇒ umbral={umbral_pow_base:.2f} dBm")
+    return umbral_pfd, umbral_pow_base
+
+def main() -> None:
+    # ---------------------- PARSING DE ARGUMENTOS --------------------------- #
+    parser = argparse.ArgumentParser(description="Detección de dron basada en Power Flux Density y potencia total.")
+    parser.add_argument("baseline",  help="CSV con el dron apagado (calibra umbrales).")
+    parser.add_argument("datafile",  nargs="*", help="CSV(s) a analizar (detección).")
+    parser.add_argument("-s", "--stats", action="store_true", help="Muestra estadísticas de ambos archivos.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para analizar varios archivos en paralelo (0 = todos los núcleos; default 1).")
+    parser.add_argument("--server", action="store_true",
+                        help="Lee por stdin una ruta de CSV por línea y evalúa cada una sin reiniciar el proceso.")
+    args = parser.parse_args()
+    if not args.datafile and not args.server:
+        parser.error("se requiere al menos un datafile (o --server)")
+    if args.jobs < 0:
+        parser.error("-j/--jobs debe ser >= 0 (0 = todos los núcleos)")
+    if args.datafile and args.server:
+        parser.error("--server lee las rutas de stdin: no admite datafiles posicionales")
+
+    # Los umbrales se calculan una sola vez y se reparten a cada archivo
+    umbrales = calibrar(args.baseline, args.stats)
+    evaluar_archivo = partial(evaluar, umbrales, args.stats)
+
+    # -------------------------- DETECCION ----------------------------------- #
+    if args.server:
+        servir(cargar_data, evaluar_archivo, imprimir)
+    elif not ejecutar(args.datafile, cargar_data, evaluar_archivo, imprimir, args.jobs):
         sys.exit(1)
-    try:
-        return pd.read_csv(ruta)
-    except UnicodeDecodeError:
-        return pd.read_csv(ruta, encoding="ISO-8859-1")
-
-def buscar_columna(df: pd.DataFrame, clave: str) -> str | None:
-    """Devuelve la primera columna que contenga la clave dada (case‑insensitive)."""
-    for col in df.columns:
-        if clave.lower() in col.lower():
-            return col
-    return None
-
-# ------------------------ CARGA DE DATOS ------------------------------------ #
-df_base = leer_csv(args.baseline)
-df_data = leer_csv(args.datafile)
-
-pfd_col_base  = buscar_columna(df_base,  "Power Flux Density")
-pfd_col_data  = buscar_columna(df_data,  "Power Flux Density")
-pow_col_base  = buscar_columna(df_base,  "Total Spectrum Power")
-pow_col_data  = buscar_columna(df_data,  "Total Spectrum Power")
-
-if not pfd_col_base or not pfd_col_data:
-    print("ERROR: No se encontro la columna 'Power Flux Density' en uno de los archivos.")
-    sys.exit(1)
-
-# --------------------- CALCULO DE UMBRALES ---------------------------------- #
-mean_pfd_base = df_base[pfd_col_base].mean()
-std_pfd_base  = df_base[pfd_col_base].std()
-umbral_pfd    = mean_pfd_base + 3 * std_pfd_base
-
-umbral_power = None
-if pow_col_base and pow_col_data:
-    mean_pow_base = df_base[pow_col_base].mean()
-    std_pow_base  = df_base[pow_col_base].std()
-    umbral_power  = mean_pow_base + 3 * std_pow_base
-
-# -------------------------- DETECCION --------------------------------------- #
-if umbral_power is not None:
-    mask = (df_data[pfd_col_data] > umbral_pfd) & (df_data[pow_col_data] > umbral_power)
-else:
-    mask = df_data[pfd_col_data] > umbral_pfd
-
-dron_detectado = mask.any()
-
-# ------------------------ RESULTADOS / STATS -------------------------------- #
-if args.stats:
-    print("\n--- ESTADISTICAS (baseline) ---")
-    print(f"{pfd_col_base}: μ={mean_pfd_base:.2f}, σ={std_pfd_base:.2f} ⇒ umbral={umbral_pfd:.2f}")
-    if umbral_power is not None:
-        print(f"{pow_col_base}: μ={mean_pow_base:.2f} dBm, σ={std_pow_base:.2f} ⇒ umbral={umbral_power:.2f} dBm")
-    print("\n--- ESTADISTICAS (data) ---")
-    print(df_data[[c for c in [pfd_col_data, pow_col_data] if c]].describe().T)
-
-print("\n===== RESULTADO =====")
-print("Dron detectado" if dron_detectado else "Sin dron")
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,14 @@ Detección robusta de dron con umbral adaptado, filtro de banda y
 histeresis temporal.
 
 Uso:
-    python detectar_dron_v2.py baseline.csv data.csv [opciones]
+    python detectar_dron_v2.py baseline.csv data.csv [data2.csv ...] [opciones]
+    python detectar_dron_v2.py baseline.csv --server [opciones] < rutas.txt
 
 Posicionales
 ------------
 baseline.csv : mediciones con el dron APAGADO (calibra umbrales)
-data.csv     : mediciones a evaluar (detección)
+data.csv     : mediciones a evaluar (detección); admite varios archivos,
+               que se parsean en segundo plano mientras se evalúa el anterior
 
 Opciones principales
 --------------------
@@ -19,98 +21,153 @@ Opciones principales
 --freq-max FMAX    Frecuencia máxima a vigilar (MHz)
 --n-consec N       Nº de muestras consecutivas requeridas (default 1)
 --stats            Imprime estadísticas y umbrales empleados
+-j N               Procesos para varios archivos en paralelo (0 = todos los núcleos)
+--server           Proceso persistente: una ruta de CSV por línea de stdin
 """
 
 import argparse
 import sys
-from pathlib import Path
+from functools import partial
 import pandas as pd
 import numpy as np
 
-# ---------------------- PARSING DE ARGUMENTOS ------------------------------ #
-parser = argparse.ArgumentParser(description="Detección de dron con mitigación de falsos positivos/negativos.")
-parser.add_argument("baseline", help="CSV con el dron apagado.")
-parser.add_argument("datafile", help="CSV con mediciones a analizar.")
-parser.add_argument("-k", "--ksigma", type=float, default=3.0,
-                    help="Multiplicador de la desviación estándar para el umbral (default 3.0).")
-parser.add_argument("--freq-min", type=float, default=None,
-                    help="Frecuencia mínima (MHz) para considerar la detección.")
-parser.add_argument("--freq-max", type=float, default=None,
-                    help="Frecuencia máxima (MHz) para considerar la detección.")
-parser.add_argument("--n-consec", type=int, default=1,
-                    help="Número de muestras consecutivas sobre umbral necesarias (default 1).")
-parser.add_argument("--stats", action="store_true", help="Mostrar estadísticas y umbrales.")
-args = parser.parse_args()
+from detector import detect_core
+from lectura_csv import buscar_columna, indexar_columnas, leer_cabecera, leer_csv
+from pipeline import cargar_baseline, ejecutar, servir
 
 # ------------------------ FUNCIONES AUXILIARES ----------------------------- #
-def leer_csv(path: str) -> pd.DataFrame:
-    path = Path(path)
-    if not path.exists():
-        print(f"ERROR: Archivo inexistente: {path}")
+def detectar(df_data: pd.DataFrame, pfd_col: str, pow_col: str | None, freq_col: str | None,
+             thr_pfd: float, thr_power: float | None, opts: argparse.Namespace) -> tuple[bool, int]:
+    # (detectado, fila donde empieza la primera racha o -1)
+    # Toda la detección trabaja sobre ndarray: sin alineación de índices de pandas
+    pfd_arr = df_data[pfd_col].to_numpy(dtype=np.float64, copy=False)
+    pow_arr = df_data[pow_col].to_numpy(dtype=np.float64, copy=False) if thr_power is not None else None
+
+    # --- Filtro de banda ---
+    freq_arr = None
+    offset = 0
+    if freq_col and hay_banda(opts):
+        freq_arr = df_data[freq_col].to_numpy(dtype=np.float64, copy=False)
+        if df_data[freq_col].is_monotonic_increasing:
+            # Barrido ordenado en frecuencia: la banda es un tramo contiguo, basta recortar
+            lo = np.searchsorted(freq_arr, opts.freq_min, side="left")
+            hi = np.searchsorted(freq_arr, opts.freq_max, side="right")
+            if hi <= lo:
+                return False, -1  # la banda no cubre ninguna muestra: nada que evaluar
+            pfd_arr = pfd_arr[lo:hi]
+            if pow_arr is not None:
+                pow_arr = pow_arr[lo:hi]
+            freq_arr, offset = None, lo
+
+    # --- Detección instantánea + histeresis ---
+    # Un solo kernel: umbrales, banda (si no se recortó) y racha de n_consec muestras,
+    # con salida en la primera racha completa
+    detected, first = detect_core(pfd_arr, pow_arr, freq_arr, thr_pfd, thr_power,
+                                  opts.freq_min, opts.freq_max, opts.n_consec)
+    return detected, first + offset if detected else -1
+
+def hay_banda(opts: argparse.Namespace) -> bool:
+    # El filtro de banda solo se aplica con ambos límites
+    return opts.freq_min is not None and opts.freq_max is not None
+
+def cargar_data(path: str, opts: argparse.Namespace) -> tuple[pd.DataFrame, str, str | None, str | None]:
+    # (df, col PFD, col potencia, col frecuencia); solo se parsean esas columnas.
+    # Corre en los hilos productores: los errores se lanzan, no se imprimen
+    cols, encoding = leer_cabecera(path)
+    idx = indexar_columnas(cols)
+    pfd_col = buscar_columna(idx, "Power Flux Density")
+    pow_col = buscar_columna(idx, "Total Spectrum Power")
+    freq_col = buscar_columna(idx, "Frequency")  # solo para filtro de banda
+    if not pfd_col:
+        raise ValueError("No se encontró 'Power Flux Density'.")
+    usecols = [c for c in [pfd_col, pow_col, freq_col] if c]
+    # Sin filtro de banda la frecuencia solo aparece en describe(): no se fuerza a float,
+    # puede ser una columna de texto que también contenga "Frequency" (p. ej. "Frequency Band")
+    numeric = usecols if hay_banda(opts) else [c for c in usecols if c != freq_col]
+    return leer_csv(path, usecols, encoding, dict.fromkeys(numeric, "float64")), pfd_col, pow_col, freq_col
+
+def evaluar(thrs: tuple[float, float | None], opts: argparse.Namespace, df_data: pd.DataFrame,
+            pfd_col: str, pow_col: str | None, freq_col: str | None) -> tuple[bool, str, pd.DataFrame | None]:
+    # (detectado, ubicación de la primera racha, describe() o None) para un archivo ya cargado
+    thr_pfd, thr_pow_base = thrs
+    # El umbral de potencia solo aplica si ambos archivos traen esa columna
+    thr_power = thr_pow_base if pow_col else None
+    dron_detectado, first = detectar(df_data, pfd_col, pow_col, freq_col, thr_pfd, thr_power, opts)
+    summary, where = None, ""
+    if opts.stats:
+        summary = df_data[[c for c in [pfd_col, pow_col, freq_col] if c]].describe().T
+        if dron_detectado:
+            in_mhz = freq_col and pd.api.types.is_numeric_dtype(df_data[freq_col])
+            where = f"fila {first}" + (f" ({df_data[freq_col].iat[first]} MHz)" if in_mhz else "")
+    return dron_detectado, where, summary
+
+def imprimir(path: str, result: tuple[bool, str, pd.DataFrame | None], multi: bool) -> None:
+    # ----------------------------- SALIDAS --------------------------------- #
+    dron_detectado, where, summary = result
+    suffix = f": {path}" if multi else ""
+    if summary is not None:
+        print(f"\n--- DATA describe(){suffix} ---")
+        print(summary)
+        if where:
+            print(f"Primera racha sobre umbral: {where}")
+
+    print(f"\n===== RESULTADO{suffix} =====")
+    print("Dron detectado" if dron_detectado else "Sin dron")
+
+def calibrar(baseline_path: str, opts: argparse.Namespace) -> tuple[float, float | None]:
+    # (thr_pfd, thr_pow o None) a partir de la baseline
+    # ------------------------ CARGA DE BASELINE ---------------------------- #
+    pfd_base, pow_base, (mu_pfd, sigma_pfd, mu_pow, sigma_pow) = cargar_baseline(baseline_path)
+
+    # ---------------------- CÁLCULO DE UMBRALES ---------------------------- #
+    thr_pfd = mu_pfd + opts.ksigma * sigma_pfd
+    thr_pow_base = mu_pow + opts.ksigma * sigma_pow if pow_base else None
+
+    if opts.stats:
+        print("\n--- BASELINE ---")
+        print(f"{pfd_base}: μ={mu_pfd:.2f}, σ={sigma_pfd:.2f}  ->  umbral={thr_pfd:.2f}")
+        if thr_pow_base is not None:
+            print(f"{pow_base}: μ={mu_pow:.2f} dBm, σ={sigma_pow:.2f}  ->  umbral={thr_pow_base:.2f} dBm")
+        if opts.freq_min is not None:
+            print(f"Filtro de banda: {opts.freq_min}–{opts.freq_max} MHz")
+    return thr_pfd, thr_pow_base
+
+def main() -> None:
+    # ---------------------- PARSING DE ARGUMENTOS -------------------------- #
+    parser = argparse.ArgumentParser(description="Detección de dron con mitigación de falsos positivos/negativos.")
+    parser.add_argument("baseline", help="CSV con el dron apagado.")
+    parser.add_argument("datafile", nargs="*", help="CSV(s) con mediciones a analizar.")
+    parser.add_argument("-k", "--ksigma", type=float, default=3.0,
+                        help="Multiplicador de la desviación estándar para el umbral (default 3.0).")
+    parser.add_argument("--freq-min", type=float, default=None,
+                        help="Frecuencia mínima (MHz) para considerar la detección.")
+    parser.add_argument("--freq-max", type=float, default=None,
+                        help="Frecuencia máxima (MHz) para considerar la detección.")
+    parser.add_argument("--n-consec", type=int, default=1,
+                        help="Número de muestras consecutivas sobre umbral necesarias (default 1).")
+    parser.add_argument("--stats", action="store_true", help="Mostrar estadísticas y umbrales.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Procesos para analizar varios archivos en paralelo (0 = todos los núcleos; default 1).")
+    parser.add_argument("--server", action="store_true",
+                        help="Leer por stdin una ruta de CSV por línea y evaluarlas sin reiniciar el proceso.")
+    args = parser.parse_args()
+    if not args.datafile and not args.server:
+        parser.error("se requiere al menos un datafile (o --server)")
+    if args.jobs < 0:
+        parser.error("-j/--jobs debe ser >= 0 (0 = todos los núcleos)")
+    if args.datafile and args.server:
+        parser.error("--server lee las rutas de stdin: no admite datafiles posicionales")
+
+    # Los umbrales se calculan una sola vez y se reparten a cada archivo
+    thrs = calibrar(args.baseline, args)
+    load = partial(cargar_data, opts=args)
+    evaluate = partial(evaluar, thrs, args)
+
+    # ------------------------------ DETECCIÓN ------------------------------ #
+    if args.server:
+        servir(load, evaluate, imprimir)
+    elif not ejecutar(args.datafile, load, evaluate, imprimir, args.jobs):
         sys.exit(1)
-    try:
-        return pd.read_csv(path)
-    except UnicodeDecodeError:
-        return pd.read_csv(path, encoding="latin1")
-
-def buscar_col(df: pd.DataFrame, key: str):
-    for c in df.columns:
-        if key.lower() in c.lower():
-            return c
-    return None
-
-# ------------------------ CARGA DE ARCHIVOS -------------------------------- #
-df_base = leer_csv(args.baseline)
-df_data = leer_csv(args.datafile)
-
-pfd_base = buscar_col(df_base, "Power Flux Density")
-pfd_data = buscar_col(df_data, "Power Flux Density")
-pow_base = buscar_col(df_base, "Total Spectrum Power")
-pow_data = buscar_col(df_data, "Total Spectrum Power")
-freq_data = buscar_col(df_data, "Frequency")  # solo para filtro de banda
-
-if not pfd_base or not pfd_data:
-    print("ERROR: No se encontró 'Power Flux Density' en uno de los archivos.")
-    sys.exit(1)
-
-# ---------------------- CÁLCULO DE UMBRALES -------------------------------- #
-mu_pfd,  sigma_pfd  = df_base[pfd_base].mean(), df_base[pfd_base].std()
-thr_pfd = mu_pfd + args.ksigma * sigma_pfd
-
-thr_power = None
-if pow_base and pow_data:
-    mu_pow, sigma_pow = df_base[pow_base].mean(), df_base[pow_base].std()
-    thr_power = mu_pow + args.ksigma * sigma_pow
-
-# ------------------------- FILTRO DE BANDA --------------------------------- #
-band_mask = np.ones(len(df_data), dtype=bool)
-if freq_data and args.freq_min is not None and args.freq_max is not None:
-    band_mask = (df_data[freq_data] >= args.freq_min) & (df_data[freq_data] <= args.freq_max)
-
-# ----------------------- DETECCIÓN INSTANTÁNEA ----------------------------- #
-instant_mask = (df_data[pfd_data] > thr_pfd) & band_mask
-if thr_power is not None:
-    instant_mask &= df_data[pow_data] > thr_power
-
-# ---------------------------- HISTERESIS ----------------------------------- #
-if args.n_consec > 1:
-    # Rolling suma: True=1, False=0 -> si la ventana suma >= n_consec => condición cumplida
-    hits = pd.Series(instant_mask.astype(int)).rolling(args.n_consec, min_periods=args.n_consec).sum() >= args.n_consec
-    dron_detectado = hits.any()
-else:
-    dron_detectado = instant_mask.any()
-
-# --------------------------- SALIDAS --------------------------------------- #
-if args.stats:
-    print("\n--- BASELINE ---")
-    print(f"{pfd_base}: μ={mu_pfd:.2f}, σ={sigma_pfd:.2f}  ->  umbral={thr_pfd:.2f}")
-    if thr_power is not None:
-        print(f"{pow_base}: μ={mu_pow:.2f} dBm, σ={sigma_pow:.2f}  ->  umbral={thr_power:.2f} dBm")
-    if args.freq_min is not None:
-        print(f"Filtro de banda: {args.freq_min}–{args.freq_max} MHz")
-    print("\n--- DATA describe() ---")
-    cols_show = [c for c in [pfd_data, pow_data, freq_data] if c]
-    print(df_data[cols_show].describe().T)
-
-print("\n===== RESULTADO =====")
-print("Dron detectado" if dron_detectado else "Sin dron")
+
+if __name__ == "__main__":
+    main()